@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# Weekday codes in datetime.weekday() order; bit i of a mask is WEEKDAYS[i]
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+MO = 1 << 0
+TU = 1 << 1
+WE = 1 << 2
+TH = 1 << 3
+FR = 1 << 4
+SA = 1 << 5
+SU = 1 << 6
+
+ALL_DAYS = (1 << 7) - 1
+
+DAY_BITS = {day: 1 << i for i, day in enumerate(WEEKDAYS)}
+
+
+def days_to_mask(days: Union[str, Iterable[str], None]) -> int:
+    """Convert day codes (list or comma-separated string) to a weekday bitmask"""
+    if not days:
+        return 0
+    if isinstance(days, str):
+        days = days.split(',')
+    mask = 0
+    for day in days:
+        code = str(day).strip().upper()
+        if code not in DAY_BITS:
+            raise ValueError(f"Days must be one of {WEEKDAYS}")
+        mask |= DAY_BITS[code]
+    return mask
+
+
+def canonical_days(days: Iterable[str]) -> Tuple[str, ...]:
+    """Return day codes de-duplicated and sorted, matching the stored column value"""
+    return tuple(sorted(set(days)))
+
+
+def mask_to_days(mask: int) -> List[str]:
+    """Convert a weekday bitmask back to day codes in weekday order"""
+    return [WEEKDAYS[weekday] for weekday in iter_weekdays(mask)]
+
+
+def iter_weekdays(mask: int) -> Iterator[int]:
+    """Yield the weekday numbers (Monday=0) set in mask, lowest first"""
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def days_until(mask: int, weekday: int) -> int:
+    """
+    Days from weekday (inclusive) to the next weekday set in mask.
+    The mask is doubled across two weeks and shifted so bit 0 is `weekday`;
+    the lowest set bit of the result is the distance.
+    """
+    if not mask & ALL_DAYS:
+        raise ValueError("Weekday mask has no days set")
+    rotated = ((mask | mask << 7) >> weekday) & ALL_DAYS
+    return (rotated & -rotated).bit_length() - 1
+
+
+def next_occurrence(start_time: datetime, mask: int, since: datetime) -> datetime:
+    """First occurrence of a weekly event starting at or after `since`"""
+    since = max(since, start_time)
+    candidate = datetime.combine(since.date(), start_time.time())
+    if candidate < since:
+        candidate += timedelta(days=1)
+    return candidate + timedelta(days=days_until(mask, candidate.weekday()))
+
+
+def iter_occurrences(start_time: datetime, mask: int, lo: datetime, hi: datetime) -> Iterator[datetime]:
+    """Yield occurrences of a weekly event starting in [lo, hi), jumping straight between matching days"""
+    occurrence = next_occurrence(start_time, mask, lo)
+    while occurrence < hi:
+        yield occurrence
+        occurrence += timedelta(days=1)
+        occurrence += timedelta(days=days_until(mask, occurrence.weekday()))
@@ -0,0 +1,11 @@
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+def to_epoch(dt: datetime) -> int:
+    """Whole seconds since the Unix epoch; naive datetimes are taken as UTC"""
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - EPOCH) // ONE_SECOND
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, event
-from sqlalchemy.ext.hybrid import hybrid_property
+from typing import Iterator
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, String, DateTime, Boolean, Index, event
+from app.core.recurrence import days_to_mask, iter_occurrences
+from app.core.timeutils import to_epoch
 from app.db.base import Base
 
 class Event(Base):
@@ -9,6 +11,7 @@ class Event(Base):
     # Add table-level indexes
     __table_args__ = (
         Index('ix_events_start_time_duration', 'start_time', 'duration'),
+        Index('ix_events_window', 'start_ts', 'end_ts'),
         Index('ix_events_recurring', 'is_recurring', 'recurring_days'),
     )
 
@@ -19,18 +22,24 @@ class Event(Base):
     duration = Column(Integer, nullable=False)  # Duration in minutes
     is_recurring = Column(Boolean, default=False, nullable=False)
     recurring_days = Column(String(20), nullable=True)  # Store as comma-separated string
+    recurring_days_mask = Column(SmallInteger, default=0, nullable=False)  # MO=1<<0 ... SU=1<<6
+    end_time = Column(DateTime, nullable=False)  # start_time + duration, stored for range queries
+    start_ts = Column(BigInteger, nullable=False)  # start_time as Unix epoch seconds
+    end_ts = Column(BigInteger, nullable=False)  # end_time as Unix epoch seconds
 
-    @hybrid_property
-    def end_time(self):
-        """Calculate the end time based on start time and duration"""
-        return self.start_time + timedelta(minutes=self.duration)
+    def iter_occurrences(self, lo: datetime, hi: datetime) -> Iterator[datetime]:
+        """Yield the start times of occurrences starting in [lo, hi)"""
+        if self.is_recurring and self.recurring_days_mask:
+            yield from iter_occurrences(self.start_time, self.recurring_days_mask, lo, hi)
+        elif lo <= self.start_time < hi:
+            yield self.start_time
 
     @property
     def recurring_days_list(self):
-        """Convert comma-separated string to list"""
+        """Convert comma-separated string to a tuple in stored order"""
         if not self.recurring_days:
-            return []
-        return self.recurring_days.split(',')
+            return ()
+        return tuple(self.recurring_days.split(','))
 
     @recurring_days_list.setter
     def recurring_days_list(self, days):
@@ -50,3 +59,23 @@ def validate_and_format_datetime(mapper, connection, target):
     """Ensure datetime is stored in UTC format"""
     if target.start_time and target.start_time.tzinfo:
         target.start_time = target.start_time.astimezone().replace(tzinfo=None)
+
+@event.listens_for(Event, 'before_insert')
+@event.listens_for(Event, 'before_update')
+def sync_derived_columns(mapper, connection, target):
+    """Keep end_time, the epoch columns and the weekday bitmask in step with their sources"""
+    target.end_time = target.start_time + timedelta(minutes=target.duration)
+    target.start_ts = to_epoch(target.start_time)
+    target.end_ts = to_epoch(target.end_time)
+    target.recurring_days_mask = days_to_mask(target.recurring_days) if target.is_recurring else 0
+
+def with_derived_columns(row: dict) -> dict:
+    """
+    Fill end_time, the epoch columns and recurring_days_mask on a row dict for bulk/Core inserts,
+    which bypass the ORM listeners above.
+    """
+    row["end_time"] = row["start_time"] + timedelta(minutes=row["duration"])
+    row["start_ts"] = to_epoch(row["start_time"])
+    row["end_ts"] = to_epoch(row["end_time"])
+    row["recurring_days_mask"] = days_to_mask(row.get("recurring_days")) if row.get("is_recurring") else 0
+    return row
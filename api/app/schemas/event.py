@@ -1,17 +1,20 @@
 from datetime import datetime, timezone
-from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from typing import Any, List, Optional, Tuple
+from pydantic import BaseModel, Field, field_validator, ConfigDict, ValidationInfo
+
+from app.core.recurrence import DAY_BITS, WEEKDAYS, canonical_days, days_to_mask
+from app.core.timeutils import to_epoch
 
 class EventBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     start_time: datetime
-    duration: int = Field(..., gt=0, description="Duration in minutes")
+    duration: int = Field(..., gt=0, le=1440, description="Duration in minutes (at most 24 hours)")
     is_recurring: bool = Field(False)
-    recurring_days: Optional[List[str]] = Field(None)
+    recurring_days: Optional[Tuple[str, ...]] = Field(None)
 
     @field_validator('recurring_days', mode='before')
     @classmethod
-    def parse_recurring_days(cls, v):
+    def parse_recurring_days(cls, v: Any) -> Any:
         """Convert comma-separated string to list or return None"""
         if isinstance(v, str):
             return v.split(',') if v else None
@@ -19,22 +22,36 @@ class EventBase(BaseModel):
 
     @field_validator("start_time")
     @classmethod
-    def ensure_utc(cls, v):
+    def ensure_utc(cls, v: datetime) -> datetime:
         if v.tzinfo:
             return v.astimezone(timezone.utc).replace(tzinfo=None)
         return v
 
     @field_validator("recurring_days")
     @classmethod
-    def validate_days(cls, v, info):
-        values = info.data
-        if values.get("is_recurring"):
+    def validate_days(cls, v: Optional[Tuple[str, ...]], info: ValidationInfo) -> Optional[Tuple[str, ...]]:
+        if info.data.get("is_recurring"):
             if not v:
                 raise ValueError("Days are required for recurring events")
-            valid_days = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
-            if not all(day in valid_days for day in v):
-                raise ValueError(f"Days must be one of {valid_days}")
-        return v
+            if any(day not in DAY_BITS for day in v):
+                raise ValueError(f"Days must be one of {WEEKDAYS}")
+        # Canonical order matches the sorted comma-separated column value
+        return canonical_days(v) if v else v
+
+    @property
+    def start_ts(self) -> int:
+        """Start time as Unix epoch seconds"""
+        return to_epoch(self.start_time)
+
+    @property
+    def end_ts(self) -> int:
+        """End time as Unix epoch seconds"""
+        return self.start_ts + self.duration * 60
+
+    @property
+    def recurring_days_mask(self) -> int:
+        """Recurring days as a weekday bitmask (MO=1<<0 ... SU=1<<6); 0 for one-off events"""
+        return days_to_mask(self.recurring_days) if self.is_recurring else 0
 
 class EventCreate(EventBase):
     """Schema for creating a new event"""
@@ -52,8 +69,8 @@ class EventResponse(EventInDB):
 
     @field_validator('recurring_days', mode='before')
     @classmethod
-    def ensure_list(cls, v):
-        """Ensure recurring_days is always a list"""
+    def ensure_list(cls, v: Any) -> Any:
+        """Ensure recurring_days is always a sequence"""
         if isinstance(v, str):
             return v.split(',') if v else []
         return v or []
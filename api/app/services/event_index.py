@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from threading import RLock
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.recurrence import days_to_mask, iter_weekdays
+from app.models.event import Event
+from app.services.interval_tree import IntervalTree
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+
+# One index per engine (or connection), built lazily on first use
+_indexes: "WeakKeyDictionary[object, EventIndex]" = WeakKeyDictionary()
+_registry_lock = RLock()
+
+
+def weekly_intervals(start_time: datetime, end_time: datetime, days_mask: int) -> List[Tuple[int, int]]:
+    """
+    Map a recurring event onto seconds-of-week intervals, one per day set in
+    the weekday bitmask. Occurrences running past the end of Sunday wrap
+    around to Monday.
+    """
+    time_of_day = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+    length = int((end_time - start_time).total_seconds())
+    intervals = []
+    for weekday in iter_weekdays(days_mask):
+        lo = weekday * SECONDS_PER_DAY + time_of_day
+        hi = lo + length
+        if hi > SECONDS_PER_WEEK:
+            intervals.append((lo, SECONDS_PER_WEEK))
+            intervals.append((0, hi - SECONDS_PER_WEEK))
+        else:
+            intervals.append((lo, hi))
+    return intervals
+
+
+def find_overlapping_pair(
+    intervals: Iterable[Tuple[Any, Any, Hashable]],
+    existing: Iterable[Tuple[Any, Any, Hashable]] = ()
+) -> Optional[Tuple[Hashable, Hashable]]:
+    """
+    Sweep-line over (lo, hi, key) half-open intervals on a single axis.
+    Returns the keys of the first two distinct owners found overlapping, or None.
+    Intervals sharing a key (e.g. the days of one recurring event) never conflict.
+
+    `existing` intervals (e.g. rows already stored) are checked against
+    `intervals` but never against each other; their keys must not collide
+    with those of `intervals`. When one of the pair is existing, it comes first.
+    """
+    # Ends sort before starts at the same instant, so touching intervals don't overlap
+    points = sorted(
+        (
+            point
+            for source, is_existing in ((intervals, False), (existing, True))
+            for lo, hi, key in source
+            for point in ((lo, 1, is_existing, key), (hi, 0, is_existing, key))
+        ),
+        key=lambda point: point[:2]
+    )
+    active: Dict[Hashable, bool] = {}
+    counts: Dict[Hashable, int] = {}
+    for _, is_start, is_existing, key in points:
+        if not is_start:
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+                del active[key]
+            continue
+        for other, other_existing in active.items():
+            if other != key and not (is_existing and other_existing):
+                return (key, other) if is_existing else (other, key)
+        active[key] = is_existing
+        counts[key] = counts.get(key, 0) + 1
+    return None
+
+
+class EventIndex:
+    """
+    In-memory interval index of recurring events.
+
+    Each recurring event is stored in `weekly` as seconds-of-week intervals, one
+    per recurring day. One-off events are not indexed: they only conflict with
+    one-off events, which the service finds with an indexed range query on
+    (start_ts, end_ts).
+    """
+
+    def __init__(self):
+        self.weekly = IntervalTree()
+        self._entries: Dict[int, List[Tuple[int, int]]] = {}
+        self._lock = RLock()
+
+    @classmethod
+    def from_events(cls, events: Iterable[Any]) -> "EventIndex":
+        """Build from events or rows exposing id, start_time, duration, is_recurring and recurring_days_mask"""
+        index = cls()
+        for event in events:
+            index.add(event)
+        return index
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._entries
+
+    def add(self, event: Event) -> None:
+        """Index (or re-index) a persisted event; one-off events are only dropped"""
+        with self._lock:
+            self.remove(event.id)
+            if not event.is_recurring:
+                return
+            end_time = event.start_time + timedelta(minutes=event.duration)
+            entries = weekly_intervals(event.start_time, end_time, event.recurring_days_mask)
+            for lo, hi in entries:
+                self.weekly.insert(lo, hi, event.id)
+            self._entries[event.id] = entries
+
+    def remove(self, event_id: int) -> None:
+        with self._lock:
+            for lo, hi in self._entries.pop(event_id, []):
+                self.weekly.remove(lo, hi, event_id)
+
+    def first_conflict(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        recurring_days=None,
+        exclude_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Return the id of a recurring event overlapping the given weekly schedule, or None"""
+        with self._lock:
+            for lo, hi in weekly_intervals(start_time, end_time, days_to_mask(recurring_days)):
+                event_id = self.weekly.first_overlap(lo, hi, exclude=exclude_id)
+                if event_id is not None:
+                    return event_id
+        return None
+
+    def intersects_any(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        recurring_days=None,
+        exclude_id: Optional[int] = None
+    ) -> bool:
+        """Return True as soon as any recurring event overlaps the given weekly schedule"""
+        return self.first_conflict(start_time, end_time, recurring_days, exclude_id) is not None
+
+
+def get_event_index(db: Session) -> EventIndex:
+    """Return the index for the session's bind, building it from the database if needed"""
+    bind = db.get_bind()
+    with _registry_lock:
+        index = _indexes.get(bind)
+        if index is None:
+            # Only the schedule columns; full ORM entities would be loaded into the session
+            rows = db.query(
+                Event.id,
+                Event.start_time,
+                Event.duration,
+                Event.is_recurring,
+                Event.recurring_days_mask
+            ).filter(Event.is_recurring).all()
+            index = EventIndex.from_events(rows)
+            _indexes[bind] = index
+            logger.debug(f"Built event index with {len(index.weekly)} weekly intervals")
+        return index
+
+
+def invalidate_event_index(bind) -> None:
+    """Drop the cached index so the next lookup rebuilds it from the database"""
+    with _registry_lock:
+        _indexes.pop(bind, None)
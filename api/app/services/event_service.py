@@ -1,13 +1,22 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, insert
 import logging
-from sqlalchemy.types import String, Interval, Time
+from sqlalchemy.types import Interval, Time
 
-from app.models.event import Event
+from app.core.recurrence import DAY_BITS, iter_occurrences
+from app.core.timeutils import to_epoch
+from app.models.event import Event, with_derived_columns
 from app.schemas.event import EventCreate, EventResponse
+from app.services.event_index import (
+    find_overlapping_pair,
+    get_event_index,
+    invalidate_event_index,
+    weekly_intervals
+)
 
 # Configure logging
 logging.basicConfig(
@@ -17,6 +26,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+@lru_cache(maxsize=1024)
+def _expand_cached(
+    start_time: datetime,
+    is_recurring: bool,
+    days_mask: int,
+    lo_ord: int,
+    hi_ord: int
+) -> Tuple[datetime, ...]:
+    """
+    Occurrence start times within whole days [lo_ord, hi_ord).
+    Keyed on the fields that define the schedule, so edited events miss the cache.
+    """
+    lo = datetime.fromordinal(lo_ord)
+    hi = datetime.fromordinal(hi_ord)
+    if is_recurring and days_mask:
+        return tuple(iter_occurrences(start_time, days_mask, lo, hi))
+    return (start_time,) if lo <= start_time < hi else ()
+
 class EventService:
     def __init__(self, db: Session):
         self.db = db
@@ -41,10 +68,8 @@ class EventService:
             logger.debug(f"Is Recurring: {event.is_recurring}")
             logger.debug(f"Recurring Days: {event.recurring_days}")
             
-            # Check for conflicts BEFORE creating the event
-            if conflict := self._get_conflict_details(event):
-                logger.warning(f"Event creation blocked due to conflict: {conflict}")
-                raise HTTPException(status_code=400, detail=conflict)
+            # Check for conflicts BEFORE inserting
+            self._raise_on_conflict(event, "creation")
             
             # Convert event to dict and handle recurring days
             event_dict = event.model_dump()
@@ -64,6 +89,7 @@ class EventService:
             # Commit the transaction
             self.db.commit()
             self.db.refresh(db_event)
+            get_event_index(self.db).add(db_event)
             
             # Detailed logging of created event
             logger.info(f"Event created successfully:")
@@ -83,6 +109,100 @@ class EventService:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
+    def bulk_create(self, events: List[EventCreate]) -> List[Event]:
+        """
+        Create many events at once.
+        
+        One-off events are swept together with the stored one-off events in
+        the batch's [min start_ts, max end_ts) window, fetched with a single
+        query. Recurring events are swept among themselves and then probed
+        against the in-memory weekly index. The batch is written with a
+        single bulk insert; nothing is written if any event conflicts.
+        
+        Overlaps inside the batch are reported as
+        {"code": "batch_conflict", "positions": [<i>, <j>], "message": <description>}
+        and overlaps with stored events as in _get_conflict_details.
+        """
+        logger.info(f"Bulk creating {len(events)} events")
+        
+        once, weekly = [], []
+        for position, event in enumerate(events):
+            if event.is_recurring:
+                event_end = event.start_time + timedelta(minutes=event.duration)
+                weekly.extend(
+                    (lo, hi, position)
+                    for lo, hi in weekly_intervals(event.start_time, event_end, event.recurring_days_mask)
+                )
+            else:
+                once.append((event.start_ts, event.end_ts, position))
+        
+        # Stored one-off events anywhere in the batch's window, keyed apart from batch positions
+        stored = {}
+        if once:
+            rows = (
+                self.db.query(Event.id, Event.name, Event.start_time, Event.end_time, Event.is_recurring, Event.start_ts, Event.end_ts)
+                .filter(
+                    Event.start_ts < max(hi for _, hi, _ in once),
+                    Event.end_ts > min(lo for lo, _, _ in once),
+                    ~Event.is_recurring
+                )
+                .all()
+            )
+            stored = {("event", row.id): row for row in rows}
+        
+        for intervals, existing in (
+            (once, [(row.start_ts, row.end_ts, key) for key, row in stored.items()]),
+            (weekly, [])
+        ):
+            pair = find_overlapping_pair(intervals, existing)
+            if pair is None:
+                continue
+            if pair[0] in stored:
+                conflict = self._conflict_detail(stored[pair[0]])
+            else:
+                first, second = sorted(pair)
+                conflict = {
+                    "code": "batch_conflict",
+                    "positions": [first, second],
+                    "message": f"Events '{events[first].name}' and '{events[second].name}' in the batch overlap"
+                }
+            logger.warning(f"Bulk creation blocked due to conflict: {conflict}")
+            raise HTTPException(status_code=400, detail=conflict)
+        
+        # Recurring events against stored ones, probed in memory
+        for event in events:
+            if event.is_recurring:
+                self._raise_on_conflict(event, "bulk creation")
+        
+        try:
+            mappings = []
+            for event in events:
+                event_dict = event.model_dump()
+                if event_dict.get('recurring_days'):
+                    event_dict['recurring_days'] = ','.join(sorted(event_dict['recurring_days']))
+                mappings.append(with_derived_columns(event_dict))
+            
+            # ORM bulk INSERT (executemany) returning the new rows in batch order
+            db_events = self.db.scalars(
+                insert(Event).returning(Event, sort_by_parameter_order=True),
+                mappings
+            ).all()
+            
+            # Index while the rows are still loaded; commit expires them
+            index = get_event_index(self.db)
+            for db_event in db_events:
+                index.add(db_event)
+            self.db.commit()
+            
+            logger.info(f"Bulk created {len(db_events)} events")
+            return db_events
+            
+        except Exception as e:
+            logger.error(f"Unexpected error bulk creating events: {str(e)}", exc_info=True)
+            self.db.rollback()
+            invalidate_event_index(self.db.get_bind())
+            raise HTTPException(status_code=500, detail=str(e))
+
     def get_events(
         self,
         start: Optional[datetime] = None,
@@ -106,6 +226,24 @@ class EventService:
         
         return query.order_by(Event.start_time).all()
 
+    def expand_event(self, event: Event, start: datetime, end: datetime) -> List[datetime]:
+        """
+        Get the start times of an event's occurrences within [start, end).
+        
+        Expansions are cached per whole-day window, so repeated reads of the
+        same week (e.g. calendar scrolling) are served from memory.
+        """
+        lo_ord = start.toordinal()
+        hi_ord = (end - timedelta(microseconds=1)).toordinal() + 1
+        occurrences = _expand_cached(
+            event.start_time,
+            event.is_recurring,
+            event.recurring_days_mask,
+            lo_ord,
+            hi_ord
+        )
+        return [occurrence for occurrence in occurrences if start <= occurrence < end]
+
     def get_event_by_id(self, event_id: int) -> Optional[Event]:
         return self.db.query(Event).filter(Event.id == event_id).first()
 
@@ -142,7 +280,10 @@ class EventService:
                 logger.warning(f"Event update blocked due to conflicts: {conflict_details}")
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Invalid event details: {conflict_details}"
+                    detail={
+                        **conflict_details,
+                        "message": f"Invalid event details: {conflict_details['message']}"
+                    }
                 )
             
             # Convert event_update to dictionary for more robust updating
@@ -172,6 +313,7 @@ class EventService:
             try:
                 self.db.commit()
                 self.db.refresh(db_event)
+                get_event_index(self.db).add(db_event)
                 
                 # Log successful update
                 logger.info(f"Event updated successfully: {db_event}")
@@ -206,6 +348,7 @@ class EventService:
         
         self.db.delete(db_event)
         self.db.commit()
+        get_event_index(self.db).remove(event_id)
         return True
 
     def get_current_events(self, current_time: datetime) -> List[Event]:
@@ -231,10 +374,7 @@ class EventService:
             non_recurring = and_(
                 ~Event.is_recurring,
                 Event.start_time <= current_time,
-                func.datetime(
-                    Event.start_time, 
-                    '+' + func.cast(Event.duration, String) + ' minutes'
-                ) >= current_time
+                Event.end_time >= current_time
             )
             
             # For recurring events, compare time components
@@ -242,14 +382,9 @@ class EventService:
             
             recurring = and_(
                 Event.is_recurring,
-                Event.recurring_days.like(f'%{current_day_code}%'),
+                Event.recurring_days_mask.op('&')(DAY_BITS[current_day_code]) != 0,
                 func.time(Event.start_time) <= current_time_str,
-                func.time(
-                    func.datetime(
-                        Event.start_time,
-                        '+' + func.cast(Event.duration, String) + ' minutes'
-                    )
-                ) >= current_time_str
+                func.time(Event.end_time) >= current_time_str
             )
             
             # Combine queries
@@ -268,14 +403,79 @@ class EventService:
                 detail=f"Error retrieving current events: {str(e)}"
             )
 
-    def _get_conflict_details(self, event: EventCreate, exclude_id: Optional[int] = None) -> Optional[str]:
+    def has_conflict(
+        self,
+        start: datetime,
+        end: datetime,
+        is_recurring: bool = False,
+        recurring_days: Optional[Sequence[str]] = None,
+        exclude_id: Optional[int] = None
+    ) -> bool:
+        """
+        Return True if any existing event overlaps [start, end).
+        
+        One-off events are checked with a single indexed range query.
+        Recurring events are probed against the in-memory weekly index,
+        which stops at the first intersecting interval without querying
+        the database.
+        
+        The index is held per process: rows written by another process (or
+        outside this service) are not seen until it is rebuilt, so the API
+        must run as a single process.
+        """
+        if not is_recurring:
+            return self._find_overlapping_event(to_epoch(start), to_epoch(end), exclude_id) is not None
+        return get_event_index(self.db).intersects_any(
+            start,
+            end,
+            recurring_days,
+            exclude_id=exclude_id
+        )
+
+    def _raise_on_conflict(self, event: EventCreate, action: str) -> None:
+        """Raise a 400 carrying the conflict detail if event overlaps a stored event"""
+        if conflict := self._get_conflict_details(event):
+            logger.warning(f"Event {action} blocked due to conflict: {conflict}")
+            raise HTTPException(status_code=400, detail=conflict)
+
+    def _find_overlapping_event(
+        self,
+        start_ts: int,
+        end_ts: int,
+        exclude_id: Optional[int] = None
+    ) -> Optional[Event]:
+        """Return one non-recurring event overlapping epoch seconds [start_ts, end_ts), using ix_events_window"""
+        return (
+            self.db.query(Event)
+            .filter(
+                Event.start_ts < end_ts,
+                Event.end_ts > start_ts,
+                ~Event.is_recurring,
+                Event.id != (exclude_id or -1)
+            )
+            .limit(1)
+            .first()
+        )
+
+    def _get_conflict_details(
+        self,
+        event: EventCreate,
+        exclude_id: Optional[int] = None
+    ) -> Optional[dict]:
         """
-        Check for event time conflicts using precise time overlap detection.
+        Check for event time conflicts.
+        
+        Non-recurring events are checked with an indexed range query on
+        the (start_ts, end_ts) epoch columns; recurring events through the in-memory
+        weekly interval index.
         
         Conflict is defined as:
         1. Events have overlapping time ranges
-        2. Events are on the same day (for non-recurring events)
-        3. Recurring events have additional conflict rules
+        2. Non-recurring events only conflict with non-recurring events
+        3. Recurring events conflict when they overlap on a shared recurring day
+        
+        Only the first conflicting event is reported, as an HTTPException detail:
+        {"code": "conflict", "with": <event id>, "message": <description>}
         """
         try:
             # Calculate event end time
@@ -285,93 +485,41 @@ class EventService:
             logger.debug(f"Checking conflicts for event: {event}")
             logger.debug(f"Event start: {event.start_time}, Event end: {event_end}")
             
-            # Base query for potential conflicts
-            query = self.db.query(Event).filter(
-                and_(
-                    # Exclude the current event if an ID is provided
-                    Event.id != (exclude_id or -1),
-                    
-                    # Check for time overlaps with more precise conditions
-                    or_(
-                        # Scenario 1: New event completely contains an existing event
-                        and_(
-                            event.start_time <= Event.start_time,
-                            event_end >= Event.start_time + timedelta(minutes=Event.duration)
-                        ),
-                        # Scenario 2: Existing event completely contains the new event
-                        and_(
-                            Event.start_time <= event.start_time,
-                            Event.start_time + timedelta(minutes=Event.duration) >= event_end
-                        ),
-                        # Scenario 3: Partial overlap at the start of the event
-                        and_(
-                            Event.start_time < event_end,
-                            Event.start_time + timedelta(minutes=Event.duration) > event.start_time
-                        )
-                    ),
-                    
-                    # Additional conditions for non-recurring events
-                    or_(
-                        # For non-recurring events, check same day
-                        and_(
-                            ~Event.is_recurring,
-                            ~event.is_recurring,
-                            Event.start_time.date() == event.start_time.date()
-                        ),
-                        # For recurring events, check day of week
-                        and_(
-                            Event.is_recurring,
-                            event.is_recurring,
-                            # Check if recurring days overlap
-                            or_(
-                                # If both have recurring days
-                                and_(
-                                    Event.recurring_days is not None,
-                                    event.recurring_days is not None,
-                                    # Check for common days
-                                    or_(
-                                        *[
-                                            Event.recurring_days.like(f'%{day}%') 
-                                            for day in event.recurring_days or []
-                                        ]
-                                    )
-                                ),
-                                # If no specific recurring days, check general recurrence
-                                Event.is_recurring
-                            )
-                        )
-                    )
-                )
-            )
-            
-            # Log the raw SQL query for debugging
-            logger.debug(f"Conflict detection query: {query.statement}")
-            
-            # Execute query and check for conflicts
-            conflicts = query.all()
-            
-            # Log conflict details
-            logger.debug(f"Number of conflicts found: {len(conflicts)}")
-            
-            if not conflicts:
-                return None
-            
-            # Generate conflict details
-            conflict_msgs = []
-            for conflict in conflicts:
-                conflict_end = conflict.start_time + timedelta(minutes=conflict.duration)
-                conflict_msgs.append(
-                    f"Conflict with event '{conflict.name}' "
-                    f"(from {conflict.start_time.strftime('%Y-%m-%d %H:%M')} "
-                    f"to {conflict_end.strftime('%Y-%m-%d %H:%M')}, "
-                    f"Recurring: {conflict.is_recurring})"
+            if not event.is_recurring:
+                conflict = self._find_overlapping_event(event.start_ts, event.end_ts, exclude_id)
+                if not conflict:
+                    return None
+            else:
+                conflict_id = get_event_index(self.db).first_conflict(
+                    event.start_time,
+                    event_end,
+                    event.recurring_days,
+                    exclude_id=exclude_id
                 )
                 
-                # Additional logging for each conflict
-                logger.debug(f"Conflict details: {conflict_msgs[-1]}")
+                if conflict_id is None:
+                    return None
+                
+                conflict = self.get_event_by_id(conflict_id)
+                if not conflict:
+                    # Index is stale (row removed behind our back); rebuild on next lookup
+                    invalidate_event_index(self.db.get_bind())
+                    return self._get_conflict_details(event, exclude_id)
             
-            return "; ".join(conflict_msgs)
+            return self._conflict_detail(conflict)
             
         except Exception as e:
             logger.error(f"Error checking conflicts: {str(e)}", exc_info=True)
             return None
+
+    def _conflict_detail(self, conflict) -> dict:
+        """Build the HTTPException detail for a conflicting event (ORM object or row)"""
+        conflict_msg = (
+            f"Conflict with event '{conflict.name}' "
+            f"(from {conflict.start_time.strftime('%Y-%m-%d %H:%M')} "
+            f"to {conflict.end_time.strftime('%Y-%m-%d %H:%M')}, "
+            f"Recurring: {conflict.is_recurring})"
+        )
+        logger.debug(f"Conflict details: {conflict_msg}")
+        
+        return {"code": "conflict", "with": conflict.id, "message": conflict_msg}
@@ -0,0 +1,174 @@
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+
+class _Node:
+    """AVL node for a half-open interval [lo, hi) tagged with a key"""
+    __slots__ = ("lo", "hi", "key", "left", "right", "height", "maxupper", "minlower")
+
+    def __init__(self, lo: Any, hi: Any, key: Hashable):
+        self.lo = lo
+        self.hi = hi
+        self.key = key
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.height = 1
+        self.maxupper = hi
+        self.minlower = lo
+
+    def sort_key(self) -> Tuple[Any, Any, Hashable]:
+        return (self.lo, self.hi, self.key)
+
+
+def _height(node: Optional[_Node]) -> int:
+    return node.height if node else 0
+
+
+def _update(node: _Node) -> None:
+    """Recompute height and subtree bounds from the children"""
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.maxupper = node.hi
+    node.minlower = node.lo
+    for child in (node.left, node.right):
+        if child is not None:
+            if child.maxupper > node.maxupper:
+                node.maxupper = child.maxupper
+            if child.minlower < node.minlower:
+                node.minlower = child.minlower
+
+
+def _rotate_right(node: _Node) -> _Node:
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node: _Node) -> _Node:
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rebalance(node: _Node) -> _Node:
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """
+    Augmented AVL tree of half-open intervals [lo, hi).
+
+    Nodes are ordered by (lo, hi, key) and carry the maximum upper bound and
+    minimum lower bound of their subtree, so overlap probes can prune whole
+    subtrees and run in O(log n). Bounds may be any mutually comparable values
+    (datetimes, ints); keys identify the owner of an interval (e.g. event id).
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any, Hashable]]:
+        """Yield (lo, hi, key) triples in order"""
+        stack = []
+        node = self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.lo, node.hi, node.key
+            node = node.right
+
+    def insert(self, lo: Any, hi: Any, key: Hashable) -> None:
+        """Insert the interval [lo, hi) owned by key"""
+        self._root = self._insert(self._root, _Node(lo, hi, key))
+        self._size += 1
+
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.sort_key() < node.sort_key():
+            node.left = self._insert(node.left, new)
+        else:
+            node.right = self._insert(node.right, new)
+        return _rebalance(node)
+
+    def remove(self, lo: Any, hi: Any, key: Hashable) -> bool:
+        """Remove the interval [lo, hi) owned by key; return False if absent"""
+        size = self._size
+        self._root = self._remove(self._root, (lo, hi, key))
+        return self._size < size
+
+    def _remove(self, node: Optional[_Node], target: Tuple[Any, Any, Hashable]) -> Optional[_Node]:
+        if node is None:
+            return None
+        current = node.sort_key()
+        if target < current:
+            node.left = self._remove(node.left, target)
+        elif current < target:
+            node.right = self._remove(node.right, target)
+        else:
+            self._size -= 1
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            # Replace with the in-order successor, then drop it from the right subtree
+            successor = node.right
+            while successor.left:
+                successor = successor.left
+            node.right = self._remove_min(node.right)
+            successor.left, successor.right = node.left, node.right
+            node = successor
+        return _rebalance(node)
+
+    def _remove_min(self, node: _Node) -> Optional[_Node]:
+        if node.left is None:
+            return node.right
+        node.left = self._remove_min(node.left)
+        return _rebalance(node)
+
+    def first_overlap(self, lo: Any, hi: Any, exclude: Optional[Hashable] = None) -> Optional[Hashable]:
+        """
+        Return the key of the leftmost stored interval overlapping [lo, hi),
+        or None. Stops at the first hit instead of collecting every match.
+        Intervals owned by `exclude` are ignored.
+        """
+        node = self._first_overlap(self._root, lo, hi, exclude)
+        return node.key if node else None
+
+    def _first_overlap(self, node: Optional[_Node], lo: Any, hi: Any, exclude: Optional[Hashable]) -> Optional[_Node]:
+        # Nothing in this subtree ends after lo or starts before hi
+        if node is None or node.maxupper <= lo or node.minlower >= hi:
+            return None
+        found = self._first_overlap(node.left, lo, hi, exclude)
+        if found:
+            return found
+        if node.lo < hi and node.hi > lo and (exclude is None or node.key != exclude):
+            return node
+        # Right subtree starts at or after node.lo
+        if node.lo < hi:
+            return self._first_overlap(node.right, lo, hi, exclude)
+        return None
+
+    def intersects_any(self, lo: Any, hi: Any, exclude: Optional[Hashable] = None) -> bool:
+        """Return True if any stored interval overlaps [lo, hi)"""
+        return self.first_overlap(lo, hi, exclude) is not None
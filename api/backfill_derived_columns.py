@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from app.db.base import engine
+from app.models.event import Event, with_derived_columns
+
+# Columns derived from start_time, duration and recurring_days
+DERIVED_COLUMNS = ("recurring_days_mask", "end_time", "start_ts", "end_ts")
+
+def backfill_derived_columns(bind=engine) -> int:
+    """
+    Bring an events table created before the derived columns existed up to date.
+
+    create_all does not alter existing tables, so missing columns are added with
+    ALTER TABLE (nullable, since SQLite cannot add a NOT NULL column without a
+    default), every row is recomputed from its source columns, and missing
+    indexes such as ix_events_window are created. Safe to run more than once.
+    Returns the number of rows backfilled.
+    """
+    table = Event.__table__
+    with bind.begin() as connection:
+        existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+        for name in DERIVED_COLUMNS:
+            if name not in existing:
+                column_type = table.c[name].type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+                print(f"Added column {name}")
+
+        rows = connection.execute(
+            select(table.c.id, table.c.start_time, table.c.duration, table.c.is_recurring, table.c.recurring_days)
+        ).mappings().all()
+        updates = []
+        for row in rows:
+            derived = with_derived_columns(dict(row))
+            updates.append({"row_id": row["id"], **{name: derived[name] for name in DERIVED_COLUMNS}})
+        if updates:
+            connection.execute(
+                update(table).where(table.c.id == bindparam("row_id")),
+                updates
+            )
+
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+    return len(updates)
+
+if __name__ == '__main__':
+    print("Backfilling derived event columns...")
+    count = backfill_derived_columns()
+    print(f"Backfilled {count} events successfully!")
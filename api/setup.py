@@ -1,7 +1,21 @@
+import os
 from setuptools import setup, find_packages
 
+# Opt-in ahead-of-time compilation of the pure-Python helpers used by the
+# schema validators (CELEBRATION_MYPYC=1 pip install .). Pydantic models
+# themselves stay interpreted; their validation runs in pydantic-core.
+ext_modules = []
+if os.environ.get('CELEBRATION_MYPYC'):
+    from mypyc.build import mypycify
+    ext_modules = mypycify([
+        '--explicit-package-bases',
+        'app/core/recurrence.py',
+        'app/core/timeutils.py',
+    ])
+
 setup(
     name='celebration-api',
     version='0.1',
     packages=find_packages(),
+    ext_modules=ext_modules,
 )
@@ -1,35 +1,88 @@
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
 
-from app.models.event import Base
+from app.models.event import Base, Event, with_derived_columns
+from app.schemas.event import EventCreate
+from app.services.event_index import invalidate_event_index
 
-# Use an in-memory SQLite database for testing
-TEST_DATABASE_URL = "sqlite:///:memory:"
+# Use an in-memory SQLite database for testing; StaticPool keeps it on one connection
+TEST_DATABASE_URL = "sqlite://"
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def db_engine():
-    """Create a SQLAlchemy engine for testing"""
+    """Create a SQLAlchemy engine and the schema once per test session"""
     engine = create_engine(
         TEST_DATABASE_URL, 
         connect_args={"check_same_thread": False},
         poolclass=StaticPool
     )
+
+    @event.listens_for(engine, "connect")
+    def configure_sqlite(dbapi_connection, connection_record):
+        # pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+        dbapi_connection.isolation_level = None
+        # Throwaway database: skip syncs and keep the rollback journal in RAM
+        dbapi_connection.execute("PRAGMA synchronous=OFF")
+        dbapi_connection.execute("PRAGMA journal_mode=MEMORY")
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
 
 @pytest.fixture(scope="function")
 def db_session(db_engine):
-    """Create a SQLAlchemy session for testing"""
-    SessionLocal = sessionmaker(
-        autocommit=False, 
-        autoflush=False, 
-        bind=db_engine
+    """
+    Create a SQLAlchemy session inside a transaction that is rolled back after
+    the test. Session commits and rollbacks only act on SAVEPOINTs, so every
+    test starts from an empty schema without recreating tables.
+    """
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="create_savepoint"
     )
-    session = SessionLocal()
     try:
         yield session
     finally:
         session.close()
+        transaction.rollback()
+        invalidate_event_index(connection)
+        connection.close()
+
+@pytest.fixture
+def make_event():
+    """
+    Build known-good EventCreate instances without running validators.
+    Use EventCreate(...) directly in tests that assert on validation errors.
+    """
+    def _make_event(**kwargs) -> EventCreate:
+        return EventCreate.model_construct(**kwargs)
+    return _make_event
+
+@pytest.fixture
+def bulk_create_events():
+    """
+    Insert many events in a single executemany round-trip, bypassing the ORM.
+    Use the service for single events whose ORM behaviour is under test.
+    """
+    def _bulk_create_events(session: Session, events: list[dict]) -> None:
+        batch = []
+        for event in events:
+            row = {"is_recurring": False, "recurring_days": None, **event}
+            if isinstance(row["recurring_days"], (list, tuple)):
+                row["recurring_days"] = ','.join(sorted(row["recurring_days"]))
+            batch.append(with_derived_columns(row))
+        session.execute(Event.__table__.insert(), batch)
+        session.commit()
+        # Rows written behind the service's back; rebuild its index on next use
+        invalidate_event_index(session.get_bind())
+    return _bulk_create_events
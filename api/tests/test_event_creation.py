@@ -1,52 +1,75 @@
+import logging
 import pytest
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from app.models.event import Event
+from app.core.recurrence import MO, WE, FR
+from app.models.event import Event, with_derived_columns
 from app.schemas.event import EventCreate
-from app.services.event_service import EventService
+from app.services.event_service import EventService, _expand_cached
 from fastapi import HTTPException
+from pydantic import TypeAdapter
 
-def test_create_simple_event(db_session: Session):
+log = logging.getLogger(__name__)
+
+# Build the EventCreate validator once for the tests that exercise validation
+EVENT_ADAPTER = TypeAdapter(EventCreate)
+
+# Fixed reference time; tests offset it by whole days to keep their windows apart
+BASE_TIME = datetime(2025, 1, 1, 9, 0, 0)
+
+def test_create_simple_event(db_session: Session, make_event):
     """Test creating a basic non-recurring event"""
-    print("Starting test_create_simple_event")
+    log.debug("Starting test_create_simple_event")
     event_service = EventService(db_session)
     
-    event_data = EventCreate(
+    event_data = make_event(
         name="Test Event",
-        start_time=datetime.now(),
+        start_time=BASE_TIME,
         duration=60,
         is_recurring=False
     )
     
-    print(f"Event data: {event_data}")
+    log.debug("Event data: %s", event_data)
     
     created_event = event_service.create_event(event_data)
     
-    print(f"Created event: {created_event}")
+    log.debug("Created event: %s", created_event)
     
     assert created_event.name == "Test Event"
     assert created_event.duration == 60
+    assert created_event.start_ts == 1735722000  # 2025-01-01 09:00 UTC; naive times are UTC
+    assert created_event.end_ts - created_event.start_ts == 60 * 60
     assert not created_event.is_recurring
-    print("test_create_simple_event completed successfully")
+    log.debug("test_create_simple_event completed successfully")
 
-def test_event_time_conflict(db_session: Session):
+def test_event_time_conflict(db_session: Session, make_event, bulk_create_events):
     """Test preventing events with overlapping times"""
-    print("Starting test_event_time_conflict")
+    log.debug("Starting test_event_time_conflict")
     event_service = EventService(db_session)
     
-    base_time = datetime.now()
+    base_time = BASE_TIME + timedelta(days=1)
     
-    # Create first event
-    first_event = EventCreate(
-        name="First Event",
-        start_time=base_time,
+    # Seed hour-long events every two hours, starting with the first event
+    bulk_create_events(db_session, [
+        {
+            "name": "First Event" if i == 0 else f"Existing Event {i}",
+            "start_time": base_time + timedelta(hours=2 * i),
+            "duration": 60,
+        }
+        for i in range(5)
+    ])
+    
+    # An event filling the gap between two existing events is allowed
+    gap_event = make_event(
+        name="Gap Event",
+        start_time=base_time + timedelta(hours=1),
         duration=60,
         is_recurring=False
     )
-    event_service.create_event(first_event)
+    event_service.create_event(gap_event)
     
     # Try to create a conflicting event
-    conflicting_event = EventCreate(
+    conflicting_event = make_event(
         name="Conflicting Event",
         start_time=base_time + timedelta(minutes=30),  # Overlaps with first event
         duration=60,
@@ -57,66 +80,287 @@ def test_event_time_conflict(db_session: Session):
         event_service.create_event(conflicting_event)
     
     assert exc_info.value.status_code == 400
-    assert "Conflict" in str(exc_info.value.detail)
-    print("test_event_time_conflict completed successfully")
+    assert exc_info.value.detail["code"] == "conflict"
+    log.debug("test_event_time_conflict completed successfully")
 
-def test_recurring_event_creation(db_session: Session):
+def test_event_conflict_with_unindexed_row(db_session: Session, make_event):
+    """Test that one-off conflicts are read from the database, not the in-memory index"""
+    log.debug("Starting test_event_conflict_with_unindexed_row")
+    event_service = EventService(db_session)
+    
+    base_time = BASE_TIME + timedelta(days=7)
+    event_service.create_event(make_event(
+        name="Indexed Event",
+        start_time=base_time,
+        duration=60,
+        is_recurring=False
+    ))
+    
+    # Written behind the service's back (e.g. by another worker process)
+    db_session.execute(Event.__table__.insert(), with_derived_columns({
+        "name": "Unindexed Event",
+        "start_time": base_time + timedelta(hours=2),
+        "duration": 60,
+        "is_recurring": False,
+        "recurring_days": None
+    }))
+    db_session.commit()
+    
+    with pytest.raises(HTTPException) as exc_info:
+        event_service.create_event(make_event(
+            name="Overlapping Event",
+            start_time=base_time + timedelta(hours=2, minutes=30),
+            duration=60,
+            is_recurring=False
+        ))
+    assert exc_info.value.detail["code"] == "conflict"
+    log.debug("test_event_conflict_with_unindexed_row completed successfully")
+
+def test_recurring_event_creation(db_session: Session, make_event):
     """Test creating a recurring event"""
-    print("Starting test_recurring_event_creation")
+    log.debug("Starting test_recurring_event_creation")
     event_service = EventService(db_session)
     
-    recurring_event = EventCreate(
+    recurring_event = make_event(
         name="Weekly Meeting",
-        start_time=datetime.now(),
+        start_time=BASE_TIME + timedelta(days=2),
         duration=90,
         is_recurring=True,
-        recurring_days=["MO", "WE", "FR"]
+        recurring_days=("MO", "WE", "FR")
     )
     
     created_event = event_service.create_event(recurring_event)
     
     assert created_event.name == "Weekly Meeting"
     assert created_event.is_recurring
-    assert set(created_event.recurring_days) == {"MO", "WE", "FR"}
-    print("test_recurring_event_creation completed successfully")
+    assert created_event.recurring_days_mask == MO | WE | FR
+    assert created_event.recurring_days_list == ("FR", "MO", "WE")
+    
+    # The schema validator canonicalizes days to the stored sorted order
+    validated_event = EVENT_ADAPTER.validate_python({
+        "name": "Weekly Meeting",
+        "start_time": BASE_TIME + timedelta(days=2),
+        "duration": 90,
+        "is_recurring": True,
+        "recurring_days": ["MO", "WE", "FR"]
+    })
+    assert validated_event.recurring_days == ("FR", "MO", "WE")
+    
+    # Repeated days are stored once
+    validated_event = EVENT_ADAPTER.validate_python({
+        "name": "Weekly Meeting",
+        "start_time": BASE_TIME + timedelta(days=2),
+        "duration": 90,
+        "is_recurring": True,
+        "recurring_days": ["WE", "MO", "WE"]
+    })
+    assert validated_event.recurring_days == ("MO", "WE")
+    log.debug("test_recurring_event_creation completed successfully")
 
-def test_invalid_recurring_event(db_session: Session):
-    """Test creating a recurring event without specifying days"""
-    print("Starting test_invalid_recurring_event")
+def test_recurring_event_occurrences(db_session: Session, make_event):
+    """Test enumerating the occurrences of a recurring event"""
+    log.debug("Starting test_recurring_event_occurrences")
     event_service = EventService(db_session)
     
-    invalid_recurring_event = EventCreate(
-        name="Invalid Recurring Event",
-        start_time=datetime.now(),
+    week_start = BASE_TIME + timedelta(days=5)  # Monday
+    created_event = event_service.create_event(make_event(
+        name="Weekly Standup",
+        start_time=week_start,
+        duration=30,
+        is_recurring=True,
+        recurring_days=("MO", "WE", "FR")
+    ))
+    
+    occurrences = list(created_event.iter_occurrences(week_start, week_start + timedelta(days=7)))
+    assert occurrences == [week_start + timedelta(days=d) for d in (0, 2, 4)]
+    
+    # A window starting mid-week wraps into the following week
+    occurrences = list(created_event.iter_occurrences(
+        week_start + timedelta(days=1),
+        week_start + timedelta(days=8)
+    ))
+    assert occurrences == [week_start + timedelta(days=d) for d in (2, 4, 7)]
+    log.debug("test_recurring_event_occurrences completed successfully")
+
+def test_recurring_event_update_frees_old_slot(db_session: Session, make_event):
+    """Test that moving a recurring event re-indexes it, freeing its old slot"""
+    log.debug("Starting test_recurring_event_update_frees_old_slot")
+    event_service = EventService(db_session)
+    
+    old_slot = make_event(
+        name="Yoga",
+        start_time=BASE_TIME,
         duration=60,
         is_recurring=True,
-        recurring_days=None
+        recurring_days=("TU", "TH")
     )
+    created_event = event_service.create_event(old_slot)
     
-    with pytest.raises(ValueError):
-        event_service.create_event(invalid_recurring_event)
-    print("test_invalid_recurring_event completed successfully")
+    event_service.update_event(created_event.id, make_event(
+        name="Yoga",
+        start_time=BASE_TIME + timedelta(hours=3),
+        duration=60,
+        is_recurring=True,
+        recurring_days=("TU", "TH")
+    ))
+    
+    # The old slot is free, the new one is taken
+    assert not event_service.has_conflict(BASE_TIME, BASE_TIME + timedelta(hours=1), True, ("TU",))
+    assert event_service.has_conflict(BASE_TIME + timedelta(hours=3), BASE_TIME + timedelta(hours=4), True, ("TH",))
+    
+    replacement = event_service.create_event(make_event(
+        name="Pilates",
+        start_time=BASE_TIME,
+        duration=60,
+        is_recurring=True,
+        recurring_days=("TU", "TH")
+    ))
+    assert replacement.id != created_event.id
+    log.debug("test_recurring_event_update_frees_old_slot completed successfully")
 
-def test_event_duration_validation(db_session: Session):
-    """Test event duration constraints"""
-    print("Starting test_event_duration_validation")
+def test_recurring_event_delete_frees_slot(db_session: Session, make_event):
+    """Test that deleting a recurring event removes it from the index"""
+    log.debug("Starting test_recurring_event_delete_frees_slot")
     event_service = EventService(db_session)
     
-    # Test invalid duration (too short)
-    with pytest.raises(ValueError):
-        EventCreate(
-            name="Too Short Event",
-            start_time=datetime.now(),
-            duration=0,
+    slot = dict(
+        name="Choir",
+        start_time=BASE_TIME,
+        duration=90,
+        is_recurring=True,
+        recurring_days=("SA",)
+    )
+    created_event = event_service.create_event(make_event(**slot))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        event_service.create_event(make_event(**slot))
+    assert exc_info.value.detail["with"] == created_event.id
+    
+    event_service.delete_event(created_event.id)
+    
+    recreated_event = event_service.create_event(make_event(**slot))
+    assert recreated_event.name == "Choir"
+    assert db_session.query(Event).count() == 1
+    log.debug("test_recurring_event_delete_frees_slot completed successfully")
+
+def test_recurring_event_expansion_cache(db_session: Session, make_event):
+    """Test that repeated expansions of the same window are served from cache"""
+    log.debug("Starting test_recurring_event_expansion_cache")
+    event_service = EventService(db_session)
+    
+    week_start = BASE_TIME + timedelta(days=5)  # Monday
+    created_event = event_service.create_event(make_event(
+        name="Weekly Review",
+        start_time=week_start + timedelta(hours=6),
+        duration=60,
+        is_recurring=True,
+        recurring_days=("TH", "TU")
+    ))
+    week_end = week_start + timedelta(days=7)
+    
+    first = event_service.expand_event(created_event, week_start, week_end)
+    hits = _expand_cached.cache_info().hits
+    second = event_service.expand_event(created_event, week_start, week_end)
+    
+    assert first == second == [week_start + timedelta(days=d, hours=6) for d in (1, 3)]
+    assert _expand_cached.cache_info().hits == hits + 1
+    log.debug("test_recurring_event_expansion_cache completed successfully")
+
+def test_bulk_event_creation(db_session: Session, make_event):
+    """Test creating a batch of events and rejecting batches that overlap"""
+    log.debug("Starting test_bulk_event_creation")
+    event_service = EventService(db_session)
+    
+    base_time = BASE_TIME + timedelta(days=6)
+    created_events = event_service.bulk_create([
+        make_event(
+            name=f"Session {i}",
+            start_time=base_time + timedelta(hours=i),
+            duration=60,
             is_recurring=False
         )
+        for i in range(3)
+    ] + [
+        make_event(
+            name="Weekend Class",
+            start_time=base_time,
+            duration=120,
+            is_recurring=True,
+            recurring_days=("SA", "SU")
+        )
+    ])
+    
+    assert [event.name for event in created_events] == [
+        "Session 0", "Session 1", "Session 2", "Weekend Class"
+    ]
+    
+    # Overlap inside the batch
+    with pytest.raises(HTTPException) as exc_info:
+        event_service.bulk_create([
+            make_event(name="Morning", start_time=base_time + timedelta(days=1), duration=90, is_recurring=False),
+            make_event(name="Overlap", start_time=base_time + timedelta(days=1, hours=1), duration=60, is_recurring=False),
+        ])
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail["code"] == "batch_conflict"
+    assert exc_info.value.detail["positions"] == [0, 1]
+    
+    # Overlap with an existing event
+    with pytest.raises(HTTPException) as exc_info:
+        event_service.bulk_create([
+            make_event(name="Late Session", start_time=base_time + timedelta(hours=2, minutes=30), duration=60, is_recurring=False),
+        ])
+    assert exc_info.value.detail["code"] == "conflict"
+    assert exc_info.value.detail["with"] == created_events[2].id
+    
+    assert db_session.query(Event).count() == 4
+    log.debug("test_bulk_event_creation completed successfully")
+
+def test_invalid_recurring_event():
+    """Test that a recurring event without days, or with unknown days, fails validation"""
+    log.debug("Starting test_invalid_recurring_event")
     
-    # Test invalid duration (too long)
     with pytest.raises(ValueError):
-        EventCreate(
-            name="Too Long Event",
-            start_time=datetime.now(),
-            duration=1441,  # More than 24 hours
-            is_recurring=False
-        )
-    print("test_event_duration_validation completed successfully")
+        EVENT_ADAPTER.validate_python({
+            "name": "Invalid Recurring Event",
+            "start_time": BASE_TIME,
+            "duration": 60,
+            "is_recurring": True,
+            "recurring_days": None
+        })
+    
+    with pytest.raises(ValueError):
+        EVENT_ADAPTER.validate_python({
+            "name": "Invalid Recurring Event",
+            "start_time": BASE_TIME,
+            "duration": 60,
+            "is_recurring": True,
+            "recurring_days": ["MO", "XX"]
+        })
+    
+    # Day codes are only checked for recurring events
+    one_off = EVENT_ADAPTER.validate_python({
+        "name": "One-off Event",
+        "start_time": BASE_TIME,
+        "duration": 60,
+        "is_recurring": False,
+        "recurring_days": ["XX"]
+    })
+    assert one_off.recurring_days_mask == 0
+    log.debug("test_invalid_recurring_event completed successfully")
+
+@pytest.mark.parametrize("duration", [
+    0,     # Too short
+    1441,  # More than 24 hours
+])
+def test_event_duration_validation(duration: int):
+    """Test event duration constraints"""
+    log.debug("Starting test_event_duration_validation")
+    
+    with pytest.raises(ValueError):
+        EVENT_ADAPTER.validate_python({
+            "name": "Invalid Duration Event",
+            "start_time": BASE_TIME,
+            "duration": duration,
+            "is_recurring": False
+        })
+    log.debug("test_event_duration_validation completed successfully")
@@ -0,0 +1,87 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from app.core.recurrence import MO, SU
+from app.services.event_index import SECONDS_PER_DAY, SECONDS_PER_WEEK, weekly_intervals
+from app.services.interval_tree import IntervalTree, _height
+
+log = logging.getLogger(__name__)
+
+def check_invariants(node):
+    """Assert AVL balance, ordering and subtree bounds below node; return its height"""
+    if node is None:
+        return 0
+    left = check_invariants(node.left)
+    right = check_invariants(node.right)
+    assert abs(left - right) <= 1
+    assert node.height == 1 + max(left, right) == _height(node)
+    if node.left:
+        assert node.left.sort_key() <= node.sort_key()
+    if node.right:
+        assert node.right.sort_key() >= node.sort_key()
+    children = [child for child in (node.left, node.right) if child]
+    assert node.maxupper == max([node.hi] + [child.maxupper for child in children])
+    assert node.minlower == min([node.lo] + [child.minlower for child in children])
+    return node.height
+
+def brute_force_overlaps(intervals, lo, hi, exclude=None):
+    return {key for a, b, key in intervals if a < hi and b > lo and key != exclude}
+
+def test_interval_tree_matches_brute_force():
+    """Test overlap probes and tree invariants against a plain list under random inserts and removals"""
+    log.debug("Starting test_interval_tree_matches_brute_force")
+    rng = random.Random(1234)
+    tree = IntervalTree()
+    stored = []
+
+    for step in range(2000):
+        if stored and rng.random() < 0.4:
+            # Removing random entries exercises the two-child successor path and rotations
+            interval = stored.pop(rng.randrange(len(stored)))
+            assert tree.remove(*interval)
+        else:
+            lo = rng.randrange(0, 1000)
+            interval = (lo, lo + rng.randrange(1, 60), rng.randrange(50))
+            tree.insert(*interval)
+            stored.append(interval)
+
+        check_invariants(tree._root)
+        assert len(tree) == len(stored)
+        assert list(tree) == sorted(stored)
+
+        lo = rng.randrange(0, 1000)
+        hi = lo + rng.randrange(1, 60)
+        exclude = rng.choice([None, rng.randrange(50)])
+        expected = brute_force_overlaps(stored, lo, hi, exclude)
+        found = tree.first_overlap(lo, hi, exclude=exclude)
+        assert (found in expected) if expected else found is None
+        assert tree.intersects_any(lo, hi, exclude=exclude) == bool(expected)
+
+    log.debug("test_interval_tree_matches_brute_force completed successfully")
+
+def test_interval_tree_half_open():
+    """Test that touching intervals do not overlap and exclude skips only its own key"""
+    tree = IntervalTree()
+    tree.insert(10, 20, "a")
+    tree.insert(15, 25, "b")
+
+    assert tree.first_overlap(20, 30) == "b"
+    assert tree.first_overlap(25, 30) is None
+    assert tree.first_overlap(0, 10) is None
+    assert tree.first_overlap(12, 14, exclude="a") is None
+    assert tree.first_overlap(16, 18, exclude="a") == "b"
+    assert not tree.remove(10, 20, "b")
+
+def test_weekly_intervals_wrap_past_sunday():
+    """Test that a Sunday occurrence running past midnight wraps around to Monday"""
+    sunday_night = datetime(2025, 1, 5, 23, 0, 0)
+
+    intervals = weekly_intervals(sunday_night, sunday_night + timedelta(hours=2), MO | SU)
+
+    monday = 23 * 3600
+    sunday = 6 * SECONDS_PER_DAY + 23 * 3600
+    assert intervals == [
+        (monday, monday + 2 * 3600),
+        (sunday, SECONDS_PER_WEEK),
+        (0, 3600),
+    ]
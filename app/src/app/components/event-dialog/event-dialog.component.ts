@@ -130,7 +130,7 @@ export class EventDialogComponent {
       name: [data.event?.name || '', [Validators.required, Validators.minLength(1), Validators.maxLength(100)]],
       startDate: [startMoment.toDate(), Validators.required],
       startHour: [startHour, Validators.required],
-      duration: [duration, [Validators.required, Validators.min(1)]],
+      duration: [duration, [Validators.required, Validators.min(1), Validators.max(1440)]],
       is_recurring: [isRecurring],
       recurring_days: [recurringDays]
     });
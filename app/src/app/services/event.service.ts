@@ -382,6 +382,7 @@ export class EventService {
             
             // If there's a specific error message from the backend, use it
             const errorMessage = error.error?.message || 
+              error.error?.detail?.message ||
               error.error?.detail || 
               'Failed to update event time';
             